@@ -1,8 +1,7 @@
 import argparse
 import os
 import sys
-from importlib import metadata
-from typing import Callable, Optional
+from typing import Any, Callable, List, Optional
 
 from jmeslog import core, model
 from jmeslog.constants import DEFAULT_RENDER_TEMPLATE
@@ -11,6 +10,38 @@ from jmeslog.errors import NoChangesFoundError, ValidationError
 SUB_CMD_FUNC = Callable[[argparse.Namespace], int]
 
 
+class LazyVersionAction(argparse.Action):
+    # Looking up the installed version pulls in importlib.metadata,
+    # which is one of the slowest imports on startup, so it's only
+    # done when --version is actually requested.
+    def __init__(
+        self,
+        option_strings: List[str],
+        dest: str = argparse.SUPPRESS,
+        default: str = argparse.SUPPRESS,
+        help: str = "show program's version number and exit",
+    ) -> None:
+        super().__init__(
+            option_strings=option_strings,
+            dest=dest,
+            default=default,
+            nargs=0,
+            help=help,
+        )
+
+    def __call__(
+        self,
+        parser: argparse.ArgumentParser,
+        namespace: argparse.Namespace,
+        values: Any,
+        option_string: Optional[str] = None,
+    ) -> None:
+        from importlib import metadata
+
+        sys.stdout.write(f'{metadata.version(__package__)}\n')
+        parser.exit()
+
+
 def cmd_new_release(args: argparse.Namespace) -> int:
     # Parse the upcoming changes and determine the type of version
     # bump.
@@ -73,8 +104,7 @@ def cmd_render(args: argparse.Namespace) -> int:
 
 
 def cmd_init(args: argparse.Namespace) -> int:
-    if not os.path.isdir(args.change_dir):
-        os.mkdir(args.change_dir)
+    os.makedirs(args.change_dir, exist_ok=True)
     return 0
 
 
@@ -99,9 +129,7 @@ def cmd_pending(args: argparse.Namespace) -> int:
 
 def create_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser()
-    parser.add_argument(
-        '--version', action='version', version=metadata.version(__package__)
-    )
+    parser.add_argument('--version', action=LazyVersionAction)
     parser.add_argument(
         '--change-dir',
         default='.changes',
@@ -1,23 +1,38 @@
-import json
+import contextlib
+import functools
+import itertools
 import os
-import random
-import shutil
-import subprocess
-import tempfile
+import re
 import time
-from dataclasses import asdict, fields
-from typing import IO, Any, Dict, List
+from dataclasses import fields
+from typing import IO, TYPE_CHECKING, Any, Callable, Dict, List, Tuple
 
-import jinja2
-from packaging.version import Version
+from packaging.version import InvalidVersion, Version
 
 from jmeslog import model
 from jmeslog.constants import DEFAULT_TEMPLATE, VALID_CHARS
 from jmeslog.errors import NoChangesFoundError, ValidationError
 
+if TYPE_CHECKING:
+    import jinja2
+
+# Computed once at import time so callers don't have to reflect
+# over the dataclass on every call.
+_ENTRY_FIELDS = tuple(f.name for f in fields(model.JMESLogEntry))
+_ENTRY_FIELD_LINE = re.compile(
+    rf'^[^\S\n]*({"|".join(map(re.escape, _ENTRY_FIELDS))}):(.*)$',
+    re.MULTILINE,
+)
+_FILENAME_COUNTER = itertools.count()
+_INVALID_FILENAME_CHARS = re.compile(
+    f'[^{re.escape("".join(sorted(VALID_CHARS)))}]+'
+)
+
 
 class EditorRetriever:
     def prompt_entry_values(self, entry: model.JMESLogEntry) -> None:
+        import tempfile
+
         with tempfile.NamedTemporaryFile('w') as f:
             self._write_template_to_tempfile(f, entry)
             self._open_tempfile_in_editor(f.name)
@@ -25,6 +40,8 @@ class EditorRetriever:
             return self._parse_filled_in_contents(contents, entry)
 
     def _open_tempfile_in_editor(self, filename: str) -> None:
+        import subprocess
+
         env = os.environ
         editor = env.get('VISUAL', env.get('EDITOR', 'vim'))
         subprocess.run([editor, filename], check=True)
@@ -54,9 +71,10 @@ class EditorRetriever:
     def _update_values_from_new_entry(
         self, entry: model.JMESLogEntry, new_entry: model.JMESLogEntry
     ) -> None:
-        for key, value in asdict(new_entry).items():
+        for name in _ENTRY_FIELDS:
+            value = getattr(new_entry, name)
             if value:
-                setattr(entry, key, value)
+                setattr(entry, name, value)
 
 
 class EntryFileParser:
@@ -64,15 +82,11 @@ class EntryFileParser:
         entry = model.JMESLogEntry.empty()
         if not contents.strip():
             return entry
-        field_names = [f.name for f in fields(entry)]
-        line_starts = tuple([f'{name}:' for name in field_names])
-        for line in contents.splitlines():
-            line = line.lstrip()
-            if line.startswith('#') or not line:
-                continue
-            if line.startswith(line_starts):
-                field_name, remaining = line.split(':', 1)
-                setattr(entry, field_name, remaining.strip())
+        # Comment lines ('#type: ...') don't match the pattern, so they
+        # are skipped without a separate check.
+        for match in _ENTRY_FIELD_LINE.finditer(contents):
+            field_name, remaining = match.groups()
+            setattr(entry, field_name, remaining.strip())
         return entry
 
 
@@ -95,36 +109,48 @@ class EntryFileWriter:
         self, entry: model.JMESLogEntry, change_dir: str
     ) -> str:
         self._create_next_release_dir(change_dir)
-        abs_filename = self._generate_random_file(entry, change_dir)
-        with open(abs_filename, 'w') as f:
-            f.write(entry.to_json())
-            f.write('\n')
+        fd, abs_filename = self._create_random_file(entry, change_dir)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(model.json_dumps(entry.to_dict()) + b'\n')
         return abs_filename
 
     def _create_next_release_dir(self, change_dir: str) -> None:
-        next_release = os.path.join(change_dir, 'next-release')
-        if not os.path.isdir(next_release):
-            os.mkdir(next_release)
+        os.makedirs(os.path.join(change_dir, 'next-release'), exist_ok=True)
 
-    def _generate_random_file(
+    def _create_random_file(
         self, entry: model.JMESLogEntry, change_dir: str
-    ) -> str:
+    ) -> Tuple[int, str]:
         next_release = os.path.join(change_dir, 'next-release')
         # Need to generate a unique filename for this change.
-        short_summary = ''.join(
-            ch for ch in entry.category if ch in VALID_CHARS
-        )
+        short_summary = _INVALID_FILENAME_CHARS.sub('', entry.category)
         filename = f'{entry.type}-{short_summary}'
-        possible_filename = self._random_filename(next_release, filename)
-        while os.path.isfile(possible_filename):
-            possible_filename = self._random_filename(next_release, filename)
-        return possible_filename
+        while True:
+            possible_filename = self._unique_filename(next_release, filename)
+            try:
+                # O_EXCL makes checking that the name is unused and
+                # creating the file a single atomic step.
+                fd = os.open(
+                    possible_filename,
+                    os.O_WRONLY | os.O_CREAT | os.O_EXCL,
+                    0o666,
+                )
+            except FileExistsError:
+                continue
+            return fd, possible_filename
 
-    def _random_filename(self, next_release: str, filename: str) -> str:
+    def _unique_filename(self, next_release: str, filename: str) -> str:
+        # The pid and a per-process counter keep names distinct even if
+        # two writers read the same clock value, so no random number or
+        # existence probe is needed.
         return os.path.join(
             next_release,
-            '%s-%s-%s.json'
-            % (time.monotonic_ns(), filename, str(random.randint(1, 100000))),
+            '%s-%s-%s-%s.json'
+            % (
+                time.monotonic_ns(),
+                filename,
+                os.getpid(),
+                next(_FILENAME_COUNTER),
+            ),
         )
 
 
@@ -154,20 +180,18 @@ class EntryRecorder:
 def validate_change_entry(
     entry: model.JMESLogEntry, schema: model.EntrySchema
 ) -> None:
-    entry_dict = asdict(entry)
-    schema_dict = asdict(schema)
     errors = []
-    for schema_field in fields(schema):
-        value = entry_dict[schema_field.name]
-        allowed_values = schema_dict[schema_field.name]
+    for name in _ENTRY_FIELDS:
+        value = getattr(entry, name)
+        # Fields without a schema entry accept any non-empty value.
+        allowed_values = getattr(schema, name, None)
         if allowed_values and value not in allowed_values:
             errors.append(
-                f'The "{schema_field.name}" value must be one of: '
+                f'The "{name}" value must be one of: '
                 f'{", ".join(allowed_values)}, received: "{value}"'
             )
-    for key, value in entry_dict.items():
         if not value:
-            errors.append(f'The "{key}" value cannot be empty.')
+            errors.append(f'The "{name}" value cannot be empty.')
     if errors:
         raise ValidationError(errors)
 
@@ -175,44 +199,93 @@ def validate_change_entry(
 def consolidate_next_release(
     next_version: str, change_dir: str, changes: model.JMESLogEntryCollection
 ) -> str:
+    import shutil
+
     # Creates a new x.y.x.json file in .changes/ with the changes in
     # .changes/next-release.
     # It'll then remove the .changes/next-release directory.
     release_file = os.path.join(change_dir, f'{next_version}.json')
-    with open(release_file, 'w') as f:
-        f.write(json.dumps(changes.to_dict(), indent=2))
-        f.write('\n')
+    contents = model.json_dumps(changes.to_dict()) + b'\n'
+    # Write to a temp file and rename it into place so a crash midway
+    # through never leaves a truncated release file behind.  If the write
+    # or rename fails, the temp file is removed as well.
+    tmp_file = f'{release_file}.tmp'
+    try:
+        with open(tmp_file, 'wb') as f:
+            f.write(contents)
+        os.replace(tmp_file, release_file)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp_file)
+        raise
     next_release_dir = os.path.join(change_dir, 'next-release')
     shutil.rmtree(next_release_dir)
     return release_file
 
 
 def find_last_released_version(change_dir: str) -> str:
-    results = sorted_versioned_releases(change_dir)
-    if results:
-        return results[-1]
+    # Only the newest release is needed, so a single max() pass is
+    # enough; there's no need to sort every release.
+    releases = _parse_release_versions(change_dir)
+    if releases:
+        return max(releases)[1]
     return '0.0.0'
 
 
 def sorted_versioned_releases(change_dir: str) -> List[str]:
-    # Strip off the '.json' suffix.
-    files = [f[:-5] for f in os.listdir(change_dir) if f.endswith('.json')]
-    return sorted(files, key=lambda x: Version(x))
+    releases = _parse_release_versions(change_dir)
+    releases.sort()
+    return [name for _, name in releases]
+
+
+def _parse_release_versions(change_dir: str) -> List[Tuple[Version, str]]:
+    # Each filename is parsed exactly once, and any .json file that
+    # isn't named after a version is skipped rather than failing the
+    # whole sort.
+    releases = []
+    with os.scandir(change_dir) as it:
+        filenames = [
+            f.name for f in it if f.name.endswith('.json') and f.is_file()
+        ]
+    for filename in filenames:
+        # Strip off the '.json' suffix.
+        name = filename[:-5]
+        try:
+            releases.append((Version(name), name))
+        except InvalidVersion:
+            continue
+    return releases
+
+
+# Only the component being bumped is converted to an int, the rest
+# (including any parts after the patch version) are carried over as-is.
+def _bump_patch(parts: List[str]) -> None:
+    parts[2] = str(int(parts[2]) + 1)
+
+
+def _bump_minor(parts: List[str]) -> None:
+    parts[1] = str(int(parts[1]) + 1)
+    parts[2] = '0'
+
+
+def _bump_major(parts: List[str]) -> None:
+    parts[0] = str(int(parts[0]) + 1)
+    parts[1] = '0'
+    parts[2] = '0'
+
+
+_VERSION_BUMPERS: Dict[model.VersionBump, Callable[[List[str]], None]] = {
+    model.VersionBump.PATCH_VERSION: _bump_patch,
+    model.VersionBump.MINOR_VERSION: _bump_minor,
+    model.VersionBump.MAJOR_VERSION: _bump_major,
+}
 
 
 def determine_next_version(
     last_released_version: str, version_bump_type: model.VersionBump
 ) -> str:
     parts = last_released_version.split('.')
-    if version_bump_type == model.VersionBump.PATCH_VERSION:
-        parts[2] = str(int(parts[2]) + 1)
-    elif version_bump_type == model.VersionBump.MINOR_VERSION:
-        parts[1] = str(int(parts[1]) + 1)
-        parts[2] = '0'
-    elif version_bump_type == model.VersionBump.MAJOR_VERSION:
-        parts[0] = str(int(parts[0]) + 1)
-        parts[1] = '0'
-        parts[2] = '0'
+    _VERSION_BUMPERS[version_bump_type](parts)
     return '.'.join(parts)
 
 
@@ -220,17 +293,35 @@ def load_next_changes(change_dir: str) -> model.JMESLogEntryCollection:
     next_release = os.path.join(change_dir, 'next-release')
     if not os.path.isdir(next_release):
         raise NoChangesFoundError()
+    with os.scandir(next_release) as it:
+        change_files = sorted(
+            (_change_file_sort_key(f.name), f.path)
+            for f in it
+            if f.name.endswith('.json') and f.is_file()
+        )
     changes = []
-    for change in sorted(os.listdir(next_release)):
-        entry = parse_entry(os.path.join(next_release, change))
+    for _, path in change_files:
+        entry = parse_entry(path)
         changes.append(entry)
     return model.JMESLogEntryCollection(changes=changes)
 
 
+def _change_file_sort_key(filename: str) -> Tuple[int, int, str]:
+    # Change files are prefixed with the time.monotonic_ns() value they
+    # were created at.  Comparing that prefix as an int keeps creation
+    # order even when two prefixes have a different number of digits,
+    # which a plain string sort gets wrong.  Files without a numeric
+    # prefix sort after the generated ones, by name.
+    prefix = filename.split('-', 1)[0]
+    if prefix.isdigit():
+        return 0, int(prefix), filename
+    return 1, 0, filename
+
+
 def parse_entry(filename: str) -> model.JMESLogEntry:
-    with open(filename) as f:
-        data = json.load(f)
-        return model.JMESLogEntry(**data)
+    with open(filename, 'rb') as f:
+        data = model.json_loads(f.read())
+        return model.JMESLogEntry.from_dict(data)
 
 
 def create_entry_recorder(
@@ -254,21 +345,30 @@ def render_changes(
     template_contents: str,
 ) -> None:
     context = {
-        'releases': reversed(list(changes.items())),
+        'releases': reversed(changes.items()),
     }
-    template = jinja2.Template(template_contents)
+    template = _compile_template(template_contents)
     result = template.render(**context)
     out.write(result)
 
 
+@functools.lru_cache(maxsize=8)
+def _compile_template(template_contents: str) -> 'jinja2.Template':
+    # jinja2 is one of the slowest imports, and only 'render' needs it.
+    import jinja2
+
+    template: jinja2.Template = jinja2.Template(template_contents)
+    return template
+
+
 def load_all_changes(
     change_dir: str,
 ) -> Dict[str, model.JMESLogEntryCollection]:
     releases = {}
     for version_number in sorted_versioned_releases(change_dir):
         filename = os.path.join(change_dir, f'{version_number}.json')
-        with open(filename) as f:
-            data = json.load(f)
+        with open(filename, 'rb') as f:
+            data = model.json_loads(f.read())
             releases[version_number] = model.JMESLogEntryCollection.from_dict(
                 data
             )
@@ -278,10 +378,12 @@ def load_all_changes(
 def render_single_release_changes(
     change_collection: model.JMESLogEntryCollection, out: IO[str]
 ) -> None:
+    parts = []
     for change in change_collection.changes:
         description = '\n  '.join(change.description.splitlines())
-        out.write(f'* {change.type}:{change.category}:{description}\n')
-    out.write('\n\n')
+        parts.append(f'* {change.type}:{change.category}:{description}\n')
+    parts.append('\n\n')
+    out.write(''.join(parts))
 
 
 class ChangeQuery:
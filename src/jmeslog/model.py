@@ -1,7 +1,30 @@
 import enum
 import json
-from dataclasses import asdict, dataclass, field
-from typing import Any, Dict, List, Union
+import operator
+from dataclasses import dataclass, field, fields
+from typing import Any, Dict, List, Sequence, Union
+
+try:
+    import orjson
+
+    _HAS_ORJSON = True
+except ImportError:  # pragma: no cover
+    _HAS_ORJSON = False
+
+
+def json_dumps(obj: Any) -> bytes:
+    # orjson is an optional speedup.  Both paths produce the same
+    # 2-space indented, UTF-8 encoded output.
+    if _HAS_ORJSON:
+        result: bytes = orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+        return result
+    return json.dumps(obj, indent=2, ensure_ascii=False).encode('utf-8')
+
+
+def json_loads(data: bytes) -> Any:
+    if _HAS_ORJSON:
+        return orjson.loads(data)
+    return json.loads(data)
 
 
 class VersionBump(enum.Enum):
@@ -12,15 +35,18 @@ class VersionBump(enum.Enum):
 
 @dataclass
 class EntrySchema:
-    type: List[str] = field(
+    type: Sequence[str] = field(
         default_factory=lambda: ['feature', 'bugfix', 'enhancement']
     )
-    # An empty list means any string is valid.
-    category: List[str] = field(default_factory=lambda: [])
+    # An empty sequence means any string is valid.
+    category: Sequence[str] = field(default_factory=lambda: [])
 
 
 @dataclass
 class JMESLogEntry:
+    # Declared by hand because dataclass(slots=True) requires 3.10.
+    __slots__ = ('type', 'category', 'description')
+
     type: str
     category: str
     description: str
@@ -29,19 +55,28 @@ class JMESLogEntry:
     def empty(cls) -> 'JMESLogEntry':
         return cls('', '', '')
 
+    @classmethod
+    def from_dict(cls, entry: Dict[str, str]) -> 'JMESLogEntry':
+        return cls(*_ENTRY_VALUES(entry))
+
     def to_json(self) -> str:
-        entry_dict = self.to_dict()
-        return json.dumps(entry_dict, indent=2)
+        return json_dumps(self.to_dict()).decode('utf-8')
 
     def to_dict(self) -> Dict[str, str]:
-        return asdict(self)
+        return {
+            'type': self.type,
+            'category': self.category,
+            'description': self.description,
+        }
 
     def is_completed(self) -> bool:
         """Check if all fields are non-empty."""
-        for value in asdict(self).values():
-            if not value:
-                return False
-        return True
+        return bool(self.type and self.category and self.description)
+
+
+# Pulls the entry's values out of a loaded dict in field order with a
+# single call, so entries can be constructed positionally.
+_ENTRY_VALUES = operator.itemgetter(*(f.name for f in fields(JMESLogEntry)))
 
 
 @dataclass
@@ -54,11 +89,11 @@ class JMESLogEntryCollection:
 
     @property
     def version_bump_type(self) -> VersionBump:
-        bump_type = VersionBump.PATCH_VERSION
-        for entry in self.changes:
-            if entry.type == 'feature':
-                bump_type = VersionBump.MINOR_VERSION
-        return bump_type
+        # No entry type currently implies a major version bump; that
+        # has to be requested explicitly with --release-version.
+        if any(entry.type == 'feature' for entry in self.changes):
+            return VersionBump.MINOR_VERSION
+        return VersionBump.PATCH_VERSION
 
     def to_dict(self) -> Dict[str, Any]:
         result = {
@@ -83,7 +118,7 @@ class JMESLogEntryCollection:
     ) -> 'JMESLogEntryCollection':
         collection = cls(
             schema_version=cls._OLD_SCHEMA_VERSION,
-            changes=[JMESLogEntry(**entry) for entry in release_info],
+            changes=[JMESLogEntry.from_dict(entry) for entry in release_info],
         )
         return collection
 
@@ -94,7 +129,8 @@ class JMESLogEntryCollection:
         collection = cls(
             schema_version=release_info['schema-version'],
             changes=[
-                JMESLogEntry(**entry) for entry in release_info['changes']
+                JMESLogEntry.from_dict(entry)
+                for entry in release_info['changes']
             ],
             summary=release_info.get('summary', ''),
         )
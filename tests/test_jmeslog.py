@@ -1,8 +1,9 @@
+import errno
+import io
 import json
 import os
 import re
-from dataclasses import dataclass
-from typing import Optional
+from typing import NamedTuple, Optional
 from unittest import mock
 
 import pytest
@@ -14,20 +15,47 @@ import jmeslog.errors
 from jmeslog import model
 
 
-@dataclass
-class CommandArgs:
+EXPECTED_FEATURE_JSON = (
+    '{\n'
+    '  "type": "feature",\n'
+    '  "category": "foo",\n'
+    '  "description": "My Feature"\n'
+    '}'
+)
+
+FEATURE_BUGFIX_SCHEMA = model.EntrySchema(type=('feature', 'bugfix'))
+
+
+class CommandArgs(NamedTuple):
     change_dir: Optional[str] = None
     release_version: Optional[str] = None
 
 
-@dataclass
-class NewChangeArgs:
+class NewChangeArgs(NamedTuple):
     type: str
     category: str
     description: str
     change_dir: Optional[str] = None
 
 
+class StubRetriever:
+    def __init__(self):
+        self.prompt_calls = []
+
+    def prompt_entry_values(self, entry):
+        self.prompt_calls.append(entry)
+
+
+def param_id(value):
+    # Readable test ids for list and VersionBump parameters, instead of
+    # pytest's generic 'entry_types0' style names.
+    if isinstance(value, model.VersionBump):
+        return value.value
+    if isinstance(value, list):
+        return '-'.join(value)
+    return None
+
+
 def new_change(change_type, category='foo', description='bar'):
     return model.JMESLogEntry(
         type=change_type, category=category, description=description
@@ -38,22 +66,29 @@ def test_create_changelog_entry():
     entry = model.JMESLogEntry(
         type='feature', category='foo', description='My Feature'
     )
-    assert entry.to_json() == (
-        '{\n'
-        '  "type": "feature",\n'
-        '  "category": "foo",\n'
-        '  "description": "My Feature"\n'
-        '}'
-    )
+    assert entry.to_json() == EXPECTED_FEATURE_JSON
+
+
+@pytest.mark.parametrize('use_orjson', [True, False])
+def test_json_helpers_match_stdlib_format(use_orjson):
+    if use_orjson:
+        pytest.importorskip('orjson')
+    data = {'type': 'feature', 'category': 'foo', 'description': 'Caf\u00e9'}
+    expected = json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+    with mock.patch.object(model, '_HAS_ORJSON', use_orjson):
+        assert model.json_dumps(data) == expected
+        assert model.json_loads(expected) == data
 
 
 def test_can_validate_allowed_values():
-    schema = model.EntrySchema(type=['feature', 'bugfix'])
     entry = model.JMESLogEntry(
         type='feature', category='foo', description='My feature'
     )
     assert (
-        jmeslog.core.validate_change_entry(entry=entry, schema=schema) is None
+        jmeslog.core.validate_change_entry(
+            entry=entry, schema=FEATURE_BUGFIX_SCHEMA
+        )
+        is None
     )
     err_msg = (
         'The "type" value must be one of: feature, bugfix, '
@@ -61,7 +96,7 @@ def test_can_validate_allowed_values():
     )
     with pytest.raises(jmeslog.errors.ValidationError, match=err_msg):
         jmeslog.core.validate_change_entry(
-            schema=schema,
+            schema=FEATURE_BUGFIX_SCHEMA,
             entry=model.JMESLogEntry(
                 type='notafeature', category='foo', description='bar'
             ),
@@ -69,12 +104,11 @@ def test_can_validate_allowed_values():
 
 
 def test_no_values_can_be_empty():
-    schema = model.EntrySchema(type=['feature', 'bugfix'])
     entry = model.JMESLogEntry(type='feature', category='foo', description='')
     err_msg = 'The "description" value cannot be empty.'
     with pytest.raises(jmeslog.errors.ValidationError, match=err_msg):
         jmeslog.core.validate_change_entry(
-            schema=schema,
+            schema=FEATURE_BUGFIX_SCHEMA,
             entry=entry,
         )
 
@@ -83,10 +117,10 @@ def test_no_prompt_if_entry_complete():
     completed = model.JMESLogEntry(
         type='feature', category='foo', description='My Feature'
     )
-    retriever = mock.Mock(spec=jmeslog.core.EditorRetriever)
+    retriever = StubRetriever()
     gen = jmeslog.core.EntryGenerator(completed, retriever)
     gen.complete_entry()
-    assert not retriever.prompt_entry_values.called
+    assert retriever.prompt_calls == []
 
 
 def test_prompt_in_editor_if_incomplete():
@@ -96,25 +130,19 @@ def test_prompt_in_editor_if_incomplete():
         # Missing a description.
         description='',
     )
-    retriever = mock.Mock(spec=jmeslog.core.EditorRetriever)
+    retriever = StubRetriever()
     gen = jmeslog.core.EntryGenerator(incomplete, retriever)
     gen.complete_entry()
-    retriever.prompt_entry_values.assert_called_with(incomplete)
+    assert retriever.prompt_calls == [incomplete]
 
 
 def test_can_return_generated_entry():
     completed = model.JMESLogEntry(
         type='feature', category='foo', description='My Feature'
     )
-    retriever = mock.Mock(spec=jmeslog.core.EditorRetriever)
+    retriever = StubRetriever()
     gen = jmeslog.core.EntryGenerator(completed, retriever)
-    assert gen.change_entry.to_json() == (
-        '{\n'
-        '  "type": "feature",\n'
-        '  "category": "foo",\n'
-        '  "description": "My Feature"\n'
-        '}'
-    )
+    assert gen.change_entry.to_json() == EXPECTED_FEATURE_JSON
 
 
 def test_can_record_entry(tmpdir):
@@ -126,7 +154,7 @@ def test_can_record_entry(tmpdir):
     recorder = jmeslog.core.EntryRecorder(
         entry_gen=jmeslog.core.EntryGenerator(
             entry=entry,
-            retriever=mock.Mock(spec=jmeslog.core.EditorRetriever),
+            retriever=StubRetriever(),
         ),
         schema=model.EntrySchema(),
         file_writer=jmeslog.core.EntryFileWriter(),
@@ -137,6 +165,36 @@ def test_can_record_entry(tmpdir):
     assert len(contents) == 1
 
 
+def test_entry_file_writer_skips_existing_filename(tmpdir):
+    change_dir = tmpdir.join('.changes')
+    next_release = change_dir.mkdir().mkdir('next-release')
+    existing = next_release.join('existing.json')
+    existing.write('original')
+    available = next_release.join('available.json')
+    writer = jmeslog.core.EntryFileWriter()
+    with mock.patch.object(
+        writer,
+        '_unique_filename',
+        side_effect=[str(existing), str(available)],
+    ):
+        filename = writer.write_next_release_entry(
+            new_change('feature'), str(change_dir)
+        )
+    assert filename == str(available)
+    assert existing.read() == 'original'
+    assert json.loads(available.read()) == new_change('feature').to_dict()
+
+
+def test_change_filename_drops_invalid_characters(tmpdir):
+    entry = model.JMESLogEntry(
+        type='feature', category='Foo B\u00e4r/x', description='bar'
+    )
+    filename = jmeslog.core.EntryFileWriter().write_next_release_entry(
+        entry, str(tmpdir)
+    )
+    assert '-feature-FooBrx-' in os.path.basename(filename)
+
+
 def _assert_entry_file_parses_to(contents, expected):
     result = jmeslog.core.EntryFileParser().parse_contents(contents)
     assert result == expected
@@ -201,6 +259,7 @@ def test_last_entry_wins():
             model.VersionBump.MINOR_VERSION,
         ),
     ],
+    ids=param_id,
 )
 def test_bugfix_is_patch_version(entry_types, bump_type):
     changes = model.JMESLogEntryCollection(
@@ -249,12 +308,45 @@ def test_can_load_next_changes_dir_into_entries(tmpdir):
     )
 
 
+def test_load_next_changes_ignores_non_json_files(tmpdir):
+    change_dir = tmpdir.join('.changes')
+    change_dir.mkdir()
+    write_change('feature', str(change_dir))
+    change_dir.join('next-release').join('.DS_Store').write('')
+    entries = jmeslog.core.load_next_changes(str(change_dir))
+    assert entries == model.JMESLogEntryCollection(
+        changes=[new_change('feature')]
+    )
+
+
+def test_load_next_changes_in_creation_order(tmpdir):
+    change_dir = tmpdir.join('.changes')
+    next_release = change_dir.mkdir().join('next-release')
+    next_release.mkdir()
+    next_release.join('10-bugfix-foo-1.json').write(
+        new_change('bugfix').to_json()
+    )
+    next_release.join('9-feature-foo-1.json').write(
+        new_change('feature').to_json()
+    )
+    next_release.join('manual.json').write(new_change('enhancement').to_json())
+    entries = jmeslog.core.load_next_changes(str(change_dir))
+    assert entries == model.JMESLogEntryCollection(
+        changes=[
+            new_change('feature'),
+            new_change('bugfix'),
+            new_change('enhancement'),
+        ]
+    )
+
+
 @pytest.mark.parametrize(
     'last_version,bump_type,new_version',
     [
         ('0.0.1', model.VersionBump.PATCH_VERSION, '0.0.2'),
         ('1.0.1', model.VersionBump.PATCH_VERSION, '1.0.2'),
         ('1.0.0', model.VersionBump.PATCH_VERSION, '1.0.1'),
+        ('1.2.3.4', model.VersionBump.PATCH_VERSION, '1.2.4.4'),
         ('1.0.0', model.VersionBump.MINOR_VERSION, '1.1.0'),
         ('1.9.0', model.VersionBump.MINOR_VERSION, '1.10.0'),
         ('1.0.9', model.VersionBump.MINOR_VERSION, '1.1.0'),
@@ -263,6 +355,7 @@ def test_can_load_next_changes_dir_into_entries(tmpdir):
         ('1.1.0', model.VersionBump.MAJOR_VERSION, '2.0.0'),
         ('1.1.1', model.VersionBump.MAJOR_VERSION, '2.0.0'),
     ],
+    ids=param_id,
 )
 def test_determine_next_version(last_version, bump_type, new_version):
     assert (
@@ -285,6 +378,18 @@ def test_can_find_last_released_version(tmpdir):
     assert jmeslog.core.find_last_released_version(str(change_dir)) == '1.20.0'
 
 
+def test_ignores_non_version_json_files(tmpdir):
+    change_dir = tmpdir.join('.changes')
+    change_dir.mkdir()
+    change_dir.join('0.1.0.json').write('{}')
+    change_dir.join('0.2.0.json').write('{}')
+    change_dir.join('notes.json').write('{}')
+    assert jmeslog.core.sorted_versioned_releases(str(change_dir)) == [
+        '0.1.0',
+        '0.2.0',
+    ]
+
+
 def test_can_consolidate_next_release(tmpdir):
     change_dir = tmpdir.join('.changes')
     change_dir.mkdir()
@@ -314,6 +419,28 @@ def test_can_consolidate_next_release(tmpdir):
     }
 
 
+def test_consolidate_removes_temp_file_on_write_error(tmpdir):
+    change_dir = tmpdir.join('.changes')
+    change_dir.mkdir()
+    next_release_dir = str(change_dir.join('next-release'))
+    changes = [write_change('feature', next_release_dir)]
+
+    class DiskFullFile(io.FileIO):
+        def write(self, data):
+            raise OSError(errno.ENOSPC, 'No space left on device')
+
+    failing_open = mock.patch.object(
+        jmeslog.core, 'open', DiskFullFile, create=True
+    )
+    with failing_open, pytest.raises(OSError, match='No space left'):
+        jmeslog.core.consolidate_next_release(
+            next_version='1.1.0',
+            change_dir=str(change_dir),
+            changes=model.JMESLogEntryCollection(changes=changes),
+        )
+    assert os.listdir(str(change_dir)) == ['next-release']
+
+
 def test_can_create_collection_from_dict():
     release_data = {
         'schema-version': '0.2',